@@ -1,165 +1,446 @@
 import asyncio
 import httpx
-import json
+import inspect
 import logging
+import orjson
+import random
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from faker import Faker
+from jsonschema import Draft202012Validator, ValidationError
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
-# Initialize MCP Server and Faker
+try:
+    import uvloop  # optional: faster event loop, not available on Windows
+except ImportError:
+    uvloop = None
+
+try:
+    import yaml  # optional: only needed for config.yaml
+except ImportError:
+    yaml = None
+
+# Initialize MCP Server
 server = Server("api-test-server")
-fake = Faker()
 
 # Logging setup
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
 # --- Load Config ---
-CONFIG_PATH = Path(__file__).parent / "config.json"
+CONFIG_DIR = Path(__file__).parent
+CONFIG_PATHS = (CONFIG_DIR / "config.yaml", CONFIG_DIR / "config.yml", CONFIG_DIR / "config.json")
+
+# An IP literal keeps host resolution off the connection path entirely
+DEFAULT_CONFIG = {"api_base_url": "http://127.0.0.1:8000/api"}
+
+# Built-in endpoint definitions; a config only needs the keys it changes.
+# An endpoint's "fields" map is replaced as a whole, never merged.
+ENDPOINT_DEFAULTS = {
+    "products": {
+        "path": "/products",
+        "fields": {
+            "name": "catch_phrase",
+            "description": "paragraph",
+            "category": "word",
+            "price": "price",
+            "stockQuantity": "int",
+            "sku": "sku",
+        },
+    },
+    "customers": {
+        "path": "/customers",
+        "fields": {
+            "firstName": "first_name",
+            "lastName": "last_name",
+            "email": "email",
+            "address": "address",
+            "phoneNumber": "phone_number",
+        },
+    },
+    "reset": {"path": "/admin/reset-test-db", "fields": {}},
+}
+
+
+def merge_config(base: dict, override: dict) -> dict:
+    """Overlay ``override`` on ``base`` key by key; a ``None`` value removes the key."""
+    merged = dict(base)
+    for key, value in override.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_config() -> dict:
+    config_path = next((path for path in CONFIG_PATHS if path.exists()), None)
+    if config_path is None:
+        raise FileNotFoundError("❌ Missing config.yaml or config.json file. Please create one before running.")
+
+    with open(config_path, "rb") as f:
+        raw = f.read()
+
+    if config_path.suffix == ".json":
+        user_config = orjson.loads(raw)
+    elif yaml is None:
+        raise ImportError(f"❌ PyYAML is required to read {config_path.name}. Install it with `pip install pyyaml`.")
+    else:
+        user_config = yaml.load(raw, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
 
-if not CONFIG_PATH.exists():
-    raise FileNotFoundError("❌ Missing config.json file. Please create it before running.")
+    # Only endpoints the config declares are enabled; each inherits its built-in defaults,
+    # and a null endpoint is dropped like any other null key
+    user_endpoints = user_config.pop("endpoints", None) or {}
+    config = merge_config(DEFAULT_CONFIG, user_config)
+    config["endpoints"] = {
+        name: merge_config(ENDPOINT_DEFAULTS.get(name, {}), endpoint)
+        for name, endpoint in user_endpoints.items()
+        if endpoint is not None
+    }
+    return config
 
-with open(CONFIG_PATH, "r") as f:
-    CONFIG = json.load(f)
+
+CONFIG = load_config()
 
 API_BASE_URL = CONFIG.get("api_base_url")
 ENDPOINTS = CONFIG.get("endpoints", {})
 
+# --- Initialize Faker ---
+# "faker_providers" optionally limits Faker to the providers the configured fields use;
+# when absent, every built-in provider is loaded.
+fake = Faker(providers=CONFIG.get("faker_providers"))
+
+# Generators used by the built-in field types, bound once
+_random_int = fake.random_int
+_random_number = fake.random_number
+_bothify = fake.bothify
+
+# Request bodies are pre-encoded with orjson rather than httpx's stdlib json
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Retry backoff: full jitter over base * 2**attempt, capped (seconds)
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_CAP = 10.0
+
+# Connection pool limits for the shared HTTP client
+MAX_CONNECTIONS = 200
+MAX_KEEPALIVE_CONNECTIONS = 100
+
+_client: httpx.AsyncClient | None = None
+
+# Caps in-flight requests at the pool size so excess tasks queue here, not in the pool
+_request_slots = asyncio.Semaphore(MAX_CONNECTIONS)
+
+# Faker generation is CPU-bound and its unique registry is not thread-safe,
+# so it runs off the event loop on a single dedicated worker thread.
+_faker_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="faker")
+
 
 # --- Dynamic Tool Registration from Config ---
-@server.list_tools()
-async def handle_list_tools() -> list[Tool]:
-    tools = []
-
-    if "products" in ENDPOINTS:
-        tools.append(
-            Tool(
-                name="create_test_products",
-                description="Creates test products by calling the /products API endpoint.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {"count": {"type": "number", "description": "Number of products to create."}},
-                    "required": ["count"],
-                },
-            )
+# Tool definitions only depend on config, so they are built once at import.
+_TOOLS: list[Tool] = []
+
+BULK_NOTE = " All records are sent in a single bulk request."
+
+if "products" in ENDPOINTS:
+    _TOOLS.append(
+        Tool(
+            name="create_test_products",
+            description="Creates test products by calling the /products API endpoint."
+            + (BULK_NOTE if "bulk_path" in ENDPOINTS["products"] else ""),
+            inputSchema={
+                "type": "object",
+                "properties": {"count": {"type": "number", "description": "Number of products to create."}},
+                "required": ["count"],
+            },
         )
+    )
 
-    if "customers" in ENDPOINTS:
-        tools.append(
-            Tool(
-                name="create_test_customers",
-                description="Creates test customers by calling the /customers API endpoint.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {"count": {"type": "number", "description": "Number of customers to create."}},
-                    "required": ["count"],
-                },
-            )
+if "customers" in ENDPOINTS:
+    _TOOLS.append(
+        Tool(
+            name="create_test_customers",
+            description="Creates test customers by calling the /customers API endpoint."
+            + (BULK_NOTE if "bulk_path" in ENDPOINTS["customers"] else ""),
+            inputSchema={
+                "type": "object",
+                "properties": {"count": {"type": "number", "description": "Number of customers to create."}},
+                "required": ["count"],
+            },
         )
+    )
 
-    if "reset" in ENDPOINTS:
-        tools.append(
-            Tool(
-                name="clear_test_data",
-                description="**DANGER**: Clears all test data via /admin/reset-test-db.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "confirm": {"type": "boolean", "description": "Set to true to confirm data wipe."}
-                    },
-                    "required": ["confirm"],
+if "reset" in ENDPOINTS:
+    _TOOLS.append(
+        Tool(
+            name="clear_test_data",
+            description="**DANGER**: Clears all test data via /admin/reset-test-db.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "confirm": {"type": "boolean", "description": "Set to true to confirm data wipe."}
                 },
-            )
+                "required": ["confirm"],
+            },
+        )
+    )
+
+
+# Schemas never change at runtime, so validators are compiled once rather than per call
+_VALIDATORS: dict[str, Draft202012Validator] = {tool.name: Draft202012Validator(tool.inputSchema) for tool in _TOOLS}
+
+
+@server.list_tools()
+async def handle_list_tools() -> list[Tool]:
+    return _TOOLS
+
+
+# --- Helper: Shared HTTP Client ---
+async def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=API_BASE_URL,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=30,
+            ),
+            timeout=httpx.Timeout(connect=5.0, read=30.0, write=30.0, pool=10.0),
+            http2=True,  # negotiated via ALPN on https; plain http stays on HTTP/1.1
         )
+    return _client
+
 
-    return tools
+async def warm_up_client(client: httpx.AsyncClient) -> None:
+    # Open a pooled connection (DNS, TCP, TLS) before the first tool call needs it
+    try:
+        await client.head("/", timeout=5.0)
+    except Exception as e:  # best effort only; this task is never awaited
+        logging.info(f"Connection warm-up to {API_BASE_URL} failed: {e}")
 
 
 # --- Helper: Generate Fake Data Based on Config ---
-def generate_fake_data(field_map: dict) -> dict:
-    data = {}
-    for key, faker_method in field_map.items():
-        if faker_method == "int":
-            data[key] = fake.random_int(min=0, max=1000)
-        elif faker_method == "price":
-            data[key] = round(fake.random_number(digits=2) + fake.random_number(digits=2) / 100, 2)
-        elif faker_method == "sku":
-            data[key] = fake.bothify(text="????-####")
-        elif hasattr(fake, faker_method):
-            value = getattr(fake, faker_method)()
+FieldPlan = tuple[tuple[str, Callable[[], object]], ...]
+
+
+def _resolve_faker_method(faker_method: str) -> Callable[[], object]:
+    if faker_method == "int":
+        return lambda: _random_int(min=0, max=1000)
+    if faker_method == "price":
+        return lambda: round(_random_number(digits=2) + _random_number(digits=2) / 100, 2)
+    if faker_method == "sku":
+        return lambda: _bothify(text="????-####")
+    if hasattr(fake, faker_method):
+        method = getattr(fake, faker_method)
+        try:
+            returns = inspect.signature(method).return_annotation if callable(method) else None
+        except (TypeError, ValueError):  # no retrievable signature
+            returns = None
+
+        # Specialize on the declared return type so rows skip the isinstance check
+        if returns in (str, "str"):
+            return lambda: method().replace("\n", ", ")  # flatten addresses
+        if isinstance(returns, type) and returns is not inspect.Signature.empty:
+            return method
+
+        def resolve():
+            value = method()
             if isinstance(value, str):
-                data[key] = value.replace("\n", ", ")  # flatten addresses
-            else:
-                data[key] = value
-        else:
-            data[key] = f"<no faker method: {faker_method}>"
-    return data
+                return value.replace("\n", ", ")  # flatten addresses
+            return value
+
+        return resolve
+
+    placeholder = f"<no faker method: {faker_method}>"
+    return lambda: placeholder
+
+
+def build_field_plan(field_map: dict) -> FieldPlan:
+    """Resolve each configured faker method once, so row generation is a plain loop."""
+    return tuple((key, _resolve_faker_method(faker_method)) for key, faker_method in field_map.items())
+
+
+def generate_fake_data(field_plan: FieldPlan) -> dict:
+    return {key: resolve() for key, resolve in field_plan}
+
+
+def _generate_batch(field_plan: FieldPlan, count: int) -> list[bytes]:
+    # Rows are encoded as they are generated so each dict is dropped straight away
+    return [orjson.dumps(generate_fake_data(field_plan)) for _ in range(count)]
+
+
+async def run_on_faker_thread(func: Callable, *args):
+    return await asyncio.get_running_loop().run_in_executor(_faker_executor, func, *args)
+
+
+_FIELD_PLANS = {name: build_field_plan(endpoint.get("fields", {})) for name, endpoint in ENDPOINTS.items()}
 
 
 # --- Helper: API Post with Retry ---
-async def api_post_with_retry(client: httpx.AsyncClient, endpoint: str, payload: dict, retries: int = 3) -> dict:
-    for attempt in range(1, retries + 1):
+def is_retryable_status(status: int) -> bool:
+    # Client errors won't succeed on retry; only server errors and throttling might
+    return status >= 500 or status == 429
+
+
+def is_retryable(error: httpx.RequestError) -> bool:
+    # Only retry transport failures where the request never reached the server,
+    # otherwise a retried POST could create a duplicate record
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+def response_data(response: httpx.Response) -> object:
+    # Bodies are decoded rather than spliced in raw, so pretty-printed or malformed
+    # JSON can't break the one-object-per-line NDJSON output
+    if not response.content:
+        return None
+    if "json" in response.headers.get("content-type", ""):
         try:
-            response = await client.post(endpoint, json=payload, timeout=30.0)
-            response.raise_for_status()
-            return {"status": "success", "data": response.json()}
-        except (httpx.RequestError, httpx.HTTPStatusError) as e:
-            logging.warning(f"Attempt {attempt} failed for {endpoint}: {e}")
-            if attempt == retries:
-                return {"status": "error", "error": str(e), "payload": payload}
-            await asyncio.sleep(2 ** attempt)  # exponential backoff
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            pass
+    return response.text
+
+
+async def post_once(client: httpx.AsyncClient, endpoint: str, body: bytes, attempt: int) -> tuple[dict, bool]:
+    """Send a single POST; returns its result and whether a failure is worth retrying."""
+    try:
+        async with _request_slots:
+            response = await client.post(endpoint, content=body, headers=JSON_HEADERS)
+    except httpx.RequestError as e:
+        logging.warning(f"Attempt {attempt} failed for {endpoint}: {e}")
+        return {"status": "error", "error": str(e)}, is_retryable(e)
+
+    if 200 <= response.status_code < 300:
+        return {"status": "success", "data": response_data(response)}, False
+
+    error = f"HTTP {response.status_code} {response.reason_phrase} for url '{response.url}'"
+    logging.warning(f"Attempt {attempt} failed for {endpoint}: {error}")
+    return {"status": "error", "error": error}, is_retryable_status(response.status_code)
+
+
+async def batch_post(client: httpx.AsyncClient, endpoint: str, bodies: list[bytes], retries: int = 3) -> list[dict]:
+    """POST every body concurrently, then retry only the retryable failures, with one backoff per round."""
+    results: list[dict | None] = [None] * len(bodies)
+    pending = list(range(len(bodies)))
+
+    for attempt in range(1, retries + 1):
+        outcomes = await asyncio.gather(
+            *(post_once(client, endpoint, bodies[i], attempt) for i in pending),
+            return_exceptions=True,
+        )
+
+        failed = []
+        for i, outcome in zip(pending, outcomes):
+            if isinstance(outcome, Exception):
+                results[i] = {"status": "error", "error": str(outcome)}
+                continue
+            results[i], retryable = outcome
+            if retryable:
+                failed.append(i)
+
+        if not failed or attempt == retries:
+            break
+        # exponential backoff with full jitter, shared by the whole round
+        await asyncio.sleep(random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** attempt)))
+        pending = failed
+
+    return results
+
+
+async def api_post_with_retry(
+    client: httpx.AsyncClient, endpoint: str, payload: dict | bytes, retries: int = 3
+) -> dict:
+    body = payload if isinstance(payload, bytes) else orjson.dumps(payload)
+    result = (await batch_post(client, endpoint, [body], retries))[0]
+    if result["status"] == "error":
+        result["payload"] = orjson.Fragment(body)
+    return result
+
+
+# --- Helper: Create Records Concurrently ---
+async def create_records(
+    client: httpx.AsyncClient, endpoint: str, field_plan: FieldPlan, count: int, bulk_endpoint: str | None = None
+) -> list[dict]:
+    bodies = await run_on_faker_thread(_generate_batch, field_plan, count)
+
+    # One request for the whole batch when the API offers a bulk endpoint
+    if bulk_endpoint:
+        return [await api_post_with_retry(client, bulk_endpoint, b'{"items":[' + b",".join(bodies) + b"]}")]
+
+    results = await batch_post(client, endpoint, bodies)
+    for body, result in zip(bodies, results):
+        result["payload"] = orjson.Fragment(body)
+    return results
+
+
+# --- Helper: Render Results as NDJSON ---
+def to_ndjson(results: list[dict]) -> str:
+    return b"\n".join(orjson.dumps(result) for result in results).decode()
 
 
 # --- Tool Handlers ---
-@server.call_tool()
+@server.call_tool(validate_input=False)  # validated below against the cached validators
 async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
+    # Only tools enabled by the config have validators
+    if name not in _VALIDATORS:
+        raise ValueError(f"Unknown tool: {name}")
+
+    try:
+        _VALIDATORS[name].validate(arguments)
+    except ValidationError as e:
+        raise ValueError(f"Input validation error: {e.message}") from e
+
     results = []
 
-    async with httpx.AsyncClient(base_url=API_BASE_URL) as client:
-        if name == "create_test_products" and "products" in ENDPOINTS:
-            count = arguments.get("count", 1)
-            fields = ENDPOINTS["products"]["fields"]
-            path = ENDPOINTS["products"]["path"]
+    client = await get_client()
 
-            for _ in range(count):
-                payload = generate_fake_data(fields)
-                result = await api_post_with_retry(client, path, payload)
-                results.append(result)
+    if name == "create_test_products":
+        count = arguments.get("count", 1)
+        path = ENDPOINTS["products"]["path"]
+        bulk_path = ENDPOINTS["products"].get("bulk_path")
 
-        elif name == "create_test_customers" and "customers" in ENDPOINTS:
-            count = arguments.get("count", 1)
-            fields = ENDPOINTS["customers"]["fields"]
-            path = ENDPOINTS["customers"]["path"]
+        results = await create_records(client, path, _FIELD_PLANS["products"], count, bulk_path)
 
-            for _ in range(count):
-                payload = generate_fake_data(fields)
-                result = await api_post_with_retry(client, path, payload)
-                results.append(result)
+    elif name == "create_test_customers":
+        count = arguments.get("count", 1)
+        path = ENDPOINTS["customers"]["path"]
+        bulk_path = ENDPOINTS["customers"].get("bulk_path")
 
-            fake.unique.clear()
+        results = await create_records(client, path, _FIELD_PLANS["customers"], count, bulk_path)
 
-        elif name == "clear_test_data" and "reset" in ENDPOINTS:
-            if not arguments.get("confirm"):
-                return [TextContent(type="text", text=json.dumps({"status": "cancelled", "reason": "Confirmation required"}))]
+        await run_on_faker_thread(fake.unique.clear)
 
-            path = ENDPOINTS["reset"]["path"]
-            result = await api_post_with_retry(client, path, {})
-            results.append(result)
+    elif name == "clear_test_data":
+        if not arguments.get("confirm"):
+            return [TextContent(type="text", text=orjson.dumps({"status": "cancelled", "reason": "Confirmation required"}).decode())]
 
-        else:
-            raise ValueError(f"Unknown tool: {name}")
+        path = ENDPOINTS["reset"]["path"]
+        result = await api_post_with_retry(client, path, {})
+        results.append(result)
 
-    return [TextContent(type="text", text=json.dumps(results, indent=2))]
+    return [TextContent(type="text", text=to_ndjson(results))]
 
 
 # --- Main Entry Point ---
 async def main():
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, initialization_options={})
+    # Warm up in the background so an unreachable API doesn't delay the MCP handshake
+    warm_up = asyncio.create_task(warm_up_client(await get_client()))
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, initialization_options={})
+    finally:
+        warm_up.cancel()
+        if _client is not None:
+            await _client.aclose()
+        _faker_executor.shutdown(wait=False)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
     